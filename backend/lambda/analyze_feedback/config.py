@@ -14,6 +14,8 @@ DYNAMODB_TABLE = os.environ.get('DYNAMODB_TABLE', 'CustomerFeedback')
 S3_BUCKET = os.environ.get('S3_BUCKET', 'customer-feedback-bucket')
 
 # Comprehend Configuration
+# Set to 'auto' to detect the dominant language per feedback (costs an
+# extra Comprehend call); any fixed code skips detection entirely
 COMPREHEND_LANGUAGE = os.environ.get('COMPREHEND_LANGUAGE', 'en')
 MAX_TEXT_LENGTH = int(os.environ.get('MAX_TEXT_LENGTH', 5000))
 
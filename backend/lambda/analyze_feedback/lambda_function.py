@@ -4,11 +4,18 @@ Analyzes customer feedback using AWS Comprehend for sentiment analysis,
 key phrase extraction, and entity recognition.
 """
 
+import base64
 import json
 import boto3
 import os
-from datetime import datetime
+import time
+from botocore.config import Config
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from decimal import Decimal
+from functools import lru_cache
+from itertools import count
+from operator import itemgetter
 from typing import Dict, Any
 
 # Import local config
@@ -26,9 +33,100 @@ except ImportError:
         MAX_ENTITIES = int(os.environ.get('MAX_ENTITIES', 5))
         ALLOWED_ORIGINS = os.environ.get('ALLOWED_ORIGINS', '*')
 
+def _json_default(obj):
+    """Serialize the non-native types that reach our JSON responses"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+# Prefer orjson (C implementation, 3-10x faster) when the deployment
+# ships it as a Lambda layer; fall back to stdlib json otherwise
+try:
+    import orjson
+
+    def json_dumps(data) -> str:
+        return orjson.dumps(data, default=_json_default).decode()
+
+    json_loads = orjson.loads
+except ImportError:
+    def json_dumps(data) -> str:
+        return json.dumps(data, default=_json_default)
+
+    json_loads = json.loads
+
+
+# Tuned transport: bounded retries and timeouts keep tail latency low,
+# and a keep-alive connection pool lets the parallel Comprehend calls
+# reuse warm TLS sessions instead of re-handshaking
+BOTO_CONFIG = Config(
+    retries={'max_attempts': 2, 'mode': 'standard'},
+    max_pool_connections=32,
+    tcp_keepalive=True,
+    connect_timeout=2,
+    read_timeout=5
+)
+
 # Initialize AWS clients
-comprehend = boto3.client('comprehend', region_name=config.AWS_REGION)
-dynamodb = boto3.resource('dynamodb', region_name=config.AWS_REGION)
+comprehend = boto3.client('comprehend', region_name=config.AWS_REGION, config=BOTO_CONFIG)
+dynamodb = boto3.resource('dynamodb', region_name=config.AWS_REGION, config=BOTO_CONFIG)
+s3 = boto3.client('s3', region_name=config.AWS_REGION, config=BOTO_CONFIG)
+feedback_table = dynamodb.Table(config.DYNAMODB_TABLE)
+
+# Shared executor for running the independent Comprehend calls concurrently.
+# Created once per container so warm invocations reuse the worker threads.
+executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='cf')
+
+# Separate small pool for DynamoDB writes so storage overlaps response
+# building instead of blocking it
+write_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='cf-write')
+
+# CORS headers never change within a container; build them once instead
+# of reallocating the dict on every response
+CORS_HEADERS = {
+    'Content-Type': 'application/json',
+    'Access-Control-Allow-Origin': config.ALLOWED_ORIGINS,
+    'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
+    'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS'
+}
+
+OPTIONS_RESPONSE = {
+    'statusCode': 200,
+    'headers': CORS_HEADERS,
+    'body': ''
+}
+
+# Pre-bound extractor for the four sentiment scores; itemgetter pulls
+# all four in one C call instead of four dict lookups
+SCORE_KEYS = ('positive', 'negative', 'neutral', 'mixed')
+get_scores = itemgetter('Positive', 'Negative', 'Neutral', 'Mixed')
+
+# Per-container sequence that disambiguates feedback IDs minted in the
+# same nanosecond
+id_counter = count()
+
+
+# Cache Comprehend responses per container so duplicate feedback (repeat
+# survey answers, bot traffic) skips the network round trip entirely.
+# The cache lives in container memory and is dropped on container recycle.
+@lru_cache(maxsize=1024)
+def cached_detect_sentiment(text: str, language_code: str) -> dict:
+    return comprehend.detect_sentiment(Text=text, LanguageCode=language_code)
+
+
+@lru_cache(maxsize=1024)
+def cached_detect_key_phrases(text: str, language_code: str) -> dict:
+    return comprehend.detect_key_phrases(Text=text, LanguageCode=language_code)
+
+
+@lru_cache(maxsize=1024)
+def cached_detect_entities(text: str, language_code: str) -> dict:
+    return comprehend.detect_entities(Text=text, LanguageCode=language_code)
+
+
+@lru_cache(maxsize=1024)
+def cached_detect_dominant_language(text: str) -> dict:
+    return comprehend.detect_dominant_language(Text=text)
 
 
 def lambda_handler(event, context):
@@ -45,12 +143,22 @@ def lambda_handler(event, context):
     
     # Handle CORS preflight
     if event.get('httpMethod') == 'OPTIONS':
-        return cors_response(200, '')
-    
+        return OPTIONS_RESPONSE
+
+    # Bulk ingestion (SQS/Kinesis trigger): analyze every record and
+    # store the results through one batched writer
+    if isinstance(event.get('Records'), list):
+        return handle_records(event['Records'])
+
     try:
         # Parse request body
         body = parse_request_body(event)
-        
+
+        # Batch payloads from the uploader carry an operation marker
+        # and an items list instead of a single feedback field
+        if body.get('operation') == 'analyze_feedback_batch':
+            return analyze_feedback_batch(body)
+
         # Extract parameters
         feedback_text = body.get('feedback', '')
         customer_id = body.get('customer_id', 'anonymous')
@@ -63,18 +171,112 @@ def lambda_handler(event, context):
         
         # Perform comprehensive analysis
         analysis = analyze_feedback(feedback_text, customer_id, metadata)
-        
-        # Store results in DynamoDB
-        store_feedback(analysis)
-        
-        # Return success response
-        return success_response(analysis)
+
+        # Start the DynamoDB write off the critical path so it overlaps
+        # response serialization
+        write_future = store_feedback(analysis)
+
+        response = success_response(analysis)
+
+        # Drain the write before handing control back to Lambda; otherwise
+        # the container may be frozen with the put still in flight
+        write_future.result()
+
+        return response
         
     except Exception as e:
         print(f"Error in lambda_handler: {str(e)}")
         return error_response(f"Internal server error: {str(e)}", 500)
 
 
+def analyze_feedback_batch(body: dict) -> dict:
+    """
+    Analyze a batch of feedback items in one request
+
+    The uploader POSTs {"operation": "analyze_feedback_batch",
+    "items": [...]} to amortize API Gateway and Lambda dispatch across
+    a chunk. Results come back per item in input order, with None for
+    items that fail validation or analysis, and the analyses are stored
+    through one batched writer.
+
+    Args:
+        body: Parsed request body carrying the items list
+
+    Returns:
+        API Gateway compatible response with per-item results
+    """
+    items = body.get('items', [])
+    if not items:
+        return error_response('items list is required', 400)
+
+    results = []
+    analyses = []
+
+    for item in items:
+        try:
+            feedback_text = item.get('feedback', '')
+            is_valid, error_message = validate_text_input(feedback_text)
+            if not is_valid:
+                print(f"Skipping invalid item: {error_message}")
+                results.append(None)
+                continue
+
+            analysis = analyze_feedback(
+                feedback_text,
+                item.get('customer_id', 'anonymous'),
+                item.get('metadata', {})
+            )
+            analyses.append(analysis)
+            results.append(analysis)
+        except Exception as e:
+            print(f"Error processing item: {str(e)}")
+            results.append(None)
+
+    store_feedback_batch(analyses)
+
+    return success_response({'results': results})
+
+
+def handle_records(records: list) -> dict:
+    """
+    Analyze a batch of queued feedback records and store them together
+
+    Args:
+        records: SQS/Kinesis record list from the Lambda event
+
+    Returns:
+        API Gateway compatible response with processed counts
+    """
+    analyses = []
+
+    for record in records:
+        try:
+            body = record.get('body', record)
+            if isinstance(body, str):
+                body = json_loads(body)
+
+            feedback_text = body.get('feedback', '')
+            is_valid, error_message = validate_text_input(feedback_text)
+            if not is_valid:
+                print(f"Skipping invalid record: {error_message}")
+                continue
+
+            analyses.append(analyze_feedback(
+                feedback_text,
+                body.get('customer_id', 'anonymous'),
+                body.get('metadata', {})
+            ))
+        except Exception as e:
+            print(f"Error processing record: {str(e)}")
+
+    store_feedback_batch(analyses)
+
+    return success_response({
+        'processed': len(analyses),
+        'received': len(records)
+    })
+
+
 def validate_text_input(text: str) -> tuple:
     """
     Validate text input for Comprehend
@@ -85,12 +287,19 @@ def validate_text_input(text: str) -> tuple:
     Returns:
         Tuple of (is_valid, error_message)
     """
-    if not text or len(text.strip()) == 0:
+    # isspace() scans in C without the throwaway copy strip() allocates
+    if not text or text.isspace():
         return False, "Text cannot be empty"
-    
+
+    # Comprehend's limit is UTF-8 bytes, not code points. Code-point
+    # length is a lower bound (1-4 bytes per char), so only pay for the
+    # encode when the text is long enough that bytes could exceed it.
     if len(text) > config.MAX_TEXT_LENGTH:
         return False, f"Text exceeds maximum length of {config.MAX_TEXT_LENGTH} characters"
-    
+
+    if len(text) > config.MAX_TEXT_LENGTH // 4 and len(text.encode('utf-8')) > config.MAX_TEXT_LENGTH:
+        return False, f"Text exceeds maximum length of {config.MAX_TEXT_LENGTH} characters"
+
     return True, ""
 
 
@@ -106,39 +315,48 @@ def analyze_feedback(feedback_text: str, customer_id: str, metadata: dict) -> di
     Returns:
         Dictionary containing analysis results
     """
-    # Generate unique feedback ID
-    feedback_id = f"feedback_{int(datetime.now().timestamp() * 1000)}"
+    # Generate unique feedback ID: nanosecond clock plus a per-container
+    # counter, so concurrent invocations cannot collide
+    feedback_id = f"feedback_{time.time_ns()}_{next(id_counter)}"
     
-    # Perform sentiment analysis
-    sentiment_response = comprehend.detect_sentiment(
-        Text=feedback_text,
-        LanguageCode=config.COMPREHEND_LANGUAGE
+    # Language detection costs a Comprehend round trip; only pay for it
+    # when the language is not pinned in config. The detected (or
+    # configured) code then steers the other three calls.
+    if config.COMPREHEND_LANGUAGE == 'auto':
+        language_response = cached_detect_dominant_language(feedback_text)
+        if language_response['Languages']:
+            dominant = language_response['Languages'][0]
+            language = {
+                'language_code': dominant['LanguageCode'],
+                'score': float(dominant['Score'])
+            }
+        else:
+            language = {'language_code': 'en', 'score': 1.0}
+    else:
+        language = {'language_code': config.COMPREHEND_LANGUAGE, 'score': 1.0}
+
+    language_code = language['language_code']
+
+    # Run the three independent Comprehend calls concurrently so total
+    # latency is ~max(call) rather than the sum of the round-trips
+    sentiment_future = executor.submit(
+        cached_detect_sentiment, feedback_text, language_code
     )
-    
-    # Extract key phrases
-    key_phrases_response = comprehend.detect_key_phrases(
-        Text=feedback_text,
-        LanguageCode=config.COMPREHEND_LANGUAGE
+    key_phrases_future = executor.submit(
+        cached_detect_key_phrases, feedback_text, language_code
     )
-    
-    # Detect entities
-    entities_response = comprehend.detect_entities(
-        Text=feedback_text,
-        LanguageCode=config.COMPREHEND_LANGUAGE
+    entities_future = executor.submit(
+        cached_detect_entities, feedback_text, language_code
     )
-    
-    # Detect language
-    language_response = comprehend.detect_dominant_language(Text=feedback_text)
+
+    sentiment_response = sentiment_future.result()
+    key_phrases_response = key_phrases_future.result()
+    entities_response = entities_future.result()
     
     # Extract data
     sentiment_data = {
         'sentiment': sentiment_response['Sentiment'],
-        'scores': {
-            'positive': float(sentiment_response['SentimentScore']['Positive']),
-            'negative': float(sentiment_response['SentimentScore']['Negative']),
-            'neutral': float(sentiment_response['SentimentScore']['Neutral']),
-            'mixed': float(sentiment_response['SentimentScore']['Mixed'])
-        }
+        'scores': dict(zip(SCORE_KEYS, map(float, get_scores(sentiment_response['SentimentScore']))))
     }
     
     key_phrases = [
@@ -158,17 +376,12 @@ def analyze_feedback(feedback_text: str, customer_id: str, metadata: dict) -> di
         for entity in entities_response['Entities'][:config.MAX_ENTITIES]
     ]
     
-    language = {
-        'language_code': language_response['Languages'][0]['LanguageCode'] if language_response['Languages'] else 'en',
-        'score': float(language_response['Languages'][0]['Score']) if language_response['Languages'] else 1.0
-    }
-    
     # Compile results
     result = {
         'feedback_id': feedback_id,
         'customer_id': customer_id,
         'feedback_text': feedback_text,
-        'timestamp': datetime.now().isoformat(),
+        'timestamp': datetime.now(timezone.utc).isoformat(),
         'sentiment': sentiment_data['sentiment'],
         'sentiment_scores': sentiment_data['scores'],
         'key_phrases': key_phrases,
@@ -180,57 +393,149 @@ def analyze_feedback(feedback_text: str, customer_id: str, metadata: dict) -> di
     return result
 
 
-def store_feedback(feedback_data: dict) -> None:
+def store_feedback(feedback_data: dict):
     """
-    Store feedback analysis results in DynamoDB
-    
+    Store feedback analysis results in DynamoDB asynchronously
+
     Args:
         feedback_data: Analysis results to store
+
+    Returns:
+        Future for the submitted write; errors are logged, not raised
     """
+    return write_executor.submit(_put_feedback, feedback_data)
+
+
+def store_feedback_batch(feedback_items: list) -> None:
+    """
+    Store multiple feedback analyses with BatchWriteItem
+
+    batch_writer chunks writes to the 25-item API limit and retries
+    unprocessed items automatically, so bulk ingestion pays one round
+    trip per 25 items instead of one per item.
+
+    Args:
+        feedback_items: List of analysis results to store
+    """
+    if not feedback_items:
+        return
+
     try:
-        table = dynamodb.Table(config.DYNAMODB_TABLE)
-        
-        # Convert floats to Decimal for DynamoDB
-        item = json.loads(json.dumps(feedback_data), parse_float=Decimal)
-        
-        table.put_item(Item=item)
-        
+        with feedback_table.batch_writer() as batch:
+            for feedback_data in feedback_items:
+                batch.put_item(Item=to_stored_item(feedback_data))
+
+        print(f"Successfully stored {len(feedback_items)} feedback items")
+
+    except Exception as e:
+        print(f"Error batch-storing feedback in DynamoDB: {str(e)}")
+        # Don't fail the request if storage fails
+
+
+def _put_feedback(feedback_data: dict) -> None:
+    """Perform the actual DynamoDB put for store_feedback"""
+    try:
+        feedback_table.put_item(Item=to_stored_item(feedback_data))
+
         print(f"Successfully stored feedback: {feedback_data['feedback_id']}")
-        
+
     except Exception as e:
         print(f"Error storing feedback in DynamoDB: {str(e)}")
         # Don't fail the request if storage fails
 
 
+def to_stored_item(feedback_data: dict) -> dict:
+    """
+    Shape an analysis result for storage
+
+    The raw feedback text (up to 5 KB) goes to S3; the DynamoDB item
+    keeps an s3_key pointer and a short preview, so analytics reads pay
+    for small items instead of full text blobs. If the S3 offload
+    fails, the full text stays inline in the item so the DynamoDB write
+    still happens — a throttle or missing permission degrades the
+    storage layout instead of dropping the feedback.
+
+    Args:
+        feedback_data: Analysis results to shape
+
+    Returns:
+        DynamoDB-ready item with Decimal numbers and GSI key
+    """
+    # Convert floats to Decimal for DynamoDB
+    item = floats_to_decimal(feedback_data)
+
+    try:
+        feedback_text = feedback_data.get('feedback_text', '')
+        s3_key = f"feedback/{feedback_data['feedback_id']}.txt"
+
+        s3.put_object(
+            Bucket=config.S3_BUCKET,
+            Key=s3_key,
+            Body=feedback_text.encode('utf-8')
+        )
+
+        item.pop('feedback_text', None)
+        item['s3_key'] = s3_key
+        item['preview'] = feedback_text[:200]
+    except Exception as e:
+        print(f"S3 offload error (non-critical): {str(e)}")
+
+    # Constant partition key for the ByTimestamp GSI so analytics can
+    # query recent feedback in timestamp order instead of scanning
+    item['gsi_pk'] = 'ALL'
+
+    return item
+
+
+def floats_to_decimal(obj):
+    """
+    Recursively convert floats to Decimal for DynamoDB
+
+    Walks the structure directly instead of round-tripping through JSON,
+    which would serialize and re-parse the entire payload.
+    """
+    if isinstance(obj, float):
+        return Decimal(str(obj))
+    if isinstance(obj, dict):
+        return {key: floats_to_decimal(value) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [floats_to_decimal(value) for value in obj]
+    return obj
+
+
 def parse_request_body(event: dict) -> dict:
-    """Parse request body from API Gateway event"""
+    """
+    Parse request body from API Gateway event
+
+    Bodies that arrive already parsed (direct invocation, some proxy
+    configurations) are passed through without a redundant JSON parse;
+    base64-encoded payloads are decoded first.
+    """
     body = event.get('body', {})
-    
+
+    if event.get('isBase64Encoded') and isinstance(body, str):
+        body = base64.b64decode(body).decode('utf-8')
+
     if isinstance(body, str):
-        return json.loads(body)
-    
+        return json_loads(body)
+
     return body
 
 
 def success_response(data: dict, status_code: int = 200) -> dict:
     """Create success response with CORS headers"""
-    return cors_response(status_code, json.dumps(data))
+    return cors_response(status_code, json_dumps(data))
 
 
 def error_response(message: str, status_code: int = 500) -> dict:
     """Create error response with CORS headers"""
-    return cors_response(status_code, json.dumps({'error': message}))
+    return cors_response(status_code, json_dumps({'error': message}))
 
 
 def cors_response(status_code: int, body: str) -> dict:
     """Create response with CORS headers"""
     return {
         'statusCode': status_code,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': config.ALLOWED_ORIGINS,
-            'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-            'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS'
-        },
+        'headers': CORS_HEADERS,
         'body': body
     }
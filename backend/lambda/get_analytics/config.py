@@ -10,6 +10,9 @@ AWS_REGION = os.environ.get('AWS_REGION', 'us-east-1')
 # DynamoDB Configuration
 DYNAMODB_TABLE = os.environ.get('DYNAMODB_TABLE', 'CustomerFeedback')
 
+# S3 Configuration (raw feedback text storage)
+S3_BUCKET = os.environ.get('S3_BUCKET', 'customer-feedback-bucket')
+
 # Query Configuration
 DEFAULT_LIMIT = int(os.environ.get('DEFAULT_LIMIT', 50))
 MAX_LIMIT = int(os.environ.get('MAX_LIMIT', 1000))
@@ -3,9 +3,13 @@ Lambda Function: Get Analytics
 Retrieves and aggregates customer feedback analytics from DynamoDB
 """
 
+import base64
 import json
 import boto3
 import os
+from boto3.dynamodb.conditions import Key
+from botocore.config import Config
+from collections import Counter
 from datetime import datetime
 from decimal import Decimal
 from typing import Dict, List, Any
@@ -18,12 +22,63 @@ except ImportError:
     class config:
         AWS_REGION = os.environ.get('AWS_REGION', 'us-east-1')
         DYNAMODB_TABLE = os.environ.get('DYNAMODB_TABLE', 'CustomerFeedback')
+        S3_BUCKET = os.environ.get('S3_BUCKET', 'customer-feedback-bucket')
         DEFAULT_LIMIT = int(os.environ.get('DEFAULT_LIMIT', 50))
         MAX_LIMIT = int(os.environ.get('MAX_LIMIT', 1000))
         ALLOWED_ORIGINS = os.environ.get('ALLOWED_ORIGINS', '*')
 
+def _json_default(obj):
+    """Serialize the non-native types that reach our JSON responses"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+# Prefer orjson (C implementation, 3-10x faster) when the deployment
+# ships it as a Lambda layer; fall back to stdlib json otherwise
+try:
+    import orjson
+
+    def json_dumps(data) -> str:
+        return orjson.dumps(data, default=_json_default).decode()
+
+    json_loads = orjson.loads
+except ImportError:
+    def json_dumps(data) -> str:
+        return json.dumps(data, default=_json_default)
+
+    json_loads = json.loads
+
+
+# Tuned transport: bounded retries and timeouts keep tail latency low,
+# and keep-alive avoids TLS re-handshakes on warm invocations
+BOTO_CONFIG = Config(
+    retries={'max_attempts': 2, 'mode': 'standard'},
+    max_pool_connections=32,
+    tcp_keepalive=True,
+    connect_timeout=2,
+    read_timeout=5
+)
+
 # Initialize AWS clients
-dynamodb = boto3.resource('dynamodb', region_name=config.AWS_REGION)
+dynamodb = boto3.resource('dynamodb', region_name=config.AWS_REGION, config=BOTO_CONFIG)
+feedback_table = dynamodb.Table(config.DYNAMODB_TABLE)
+s3 = boto3.client('s3', region_name=config.AWS_REGION, config=BOTO_CONFIG)
+
+# CORS headers never change within a container; build them once instead
+# of reallocating the dict on every response
+CORS_HEADERS = {
+    'Content-Type': 'application/json',
+    'Access-Control-Allow-Origin': config.ALLOWED_ORIGINS,
+    'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
+    'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS'
+}
+
+OPTIONS_RESPONSE = {
+    'statusCode': 200,
+    'headers': CORS_HEADERS,
+    'body': ''
+}
 
 
 def lambda_handler(event, context):
@@ -40,7 +95,7 @@ def lambda_handler(event, context):
     
     # Handle CORS preflight
     if event.get('httpMethod') == 'OPTIONS':
-        return cors_response(200, '')
+        return OPTIONS_RESPONSE
     
     try:
         # Parse request body
@@ -70,22 +125,43 @@ def get_analytics(limit: int) -> Dict[str, Any]:
         Dictionary containing aggregated analytics
     """
     try:
-        table = dynamodb.Table(config.DYNAMODB_TABLE)
-        
-        # Scan table with limit
-        response = table.scan(Limit=limit)
+        # Query the ByTimestamp GSI newest-first; unlike a scan, this
+        # reads only limit-many items and returns them in true timestamp
+        # order. Project just the attributes the aggregation touches —
+        # full items carry up to 5 KB of feedback_text each, which would
+        # multiply the payload ~10x at MAX_LIMIT.
+        response = feedback_table.query(
+            IndexName='ByTimestamp',
+            KeyConditionExpression=Key('gsi_pk').eq('ALL'),
+            ScanIndexForward=False,
+            Limit=limit,
+            ProjectionExpression='feedback_id, customer_id, sentiment, sentiment_scores, #m.category, #ts',
+            ExpressionAttributeNames={'#m': 'metadata', '#ts': 'timestamp'}
+        )
         items = response.get('Items', [])
-        
+
         # Convert Decimal to float for JSON serialization
-        items = json.loads(json.dumps(items, default=decimal_to_float))
-        
+        items = decimals_to_float(items)
+
         # Calculate aggregated statistics
         analytics = calculate_analytics(items)
-        
+
+        # recent_feedback wants complete items, so fetch just the ten
+        # newest without a projection
+        recent_response = feedback_table.query(
+            IndexName='ByTimestamp',
+            KeyConditionExpression=Key('gsi_pk').eq('ALL'),
+            ScanIndexForward=False,
+            Limit=10
+        )
+        analytics['recent_feedback'] = hydrate_feedback_text(
+            decimals_to_float(recent_response.get('Items', []))
+        )
+
         # Add timestamp
         analytics['timestamp'] = datetime.now().isoformat()
         analytics['total_retrieved'] = len(items)
-        
+
         return analytics
         
     except Exception as e:
@@ -105,36 +181,40 @@ def calculate_analytics(items: List[Dict]) -> Dict[str, Any]:
         Dictionary containing calculated analytics
     """
     total_feedback = len(items)
-    
-    # Initialize counters
+
+    # Count sentiments and per-customer volume in C via Counter
     sentiment_counts = {
         'POSITIVE': 0,
         'NEGATIVE': 0,
         'NEUTRAL': 0,
         'MIXED': 0
     }
-    
+    sentiment_counts.update(
+        Counter(item.get('sentiment', 'NEUTRAL') for item in items)
+    )
+
+    customer_feedback_count = Counter(
+        item.get('customer_id', 'anonymous') for item in items
+    )
+
     avg_scores = {
         'positive': 0,
         'negative': 0,
         'neutral': 0,
         'mixed': 0
     }
-    
+
     category_sentiment = {}
-    customer_feedback_count = {}
-    
-    # Aggregate data
+
+    # Aggregate score sums and category sentiment in a single pass
     for item in items:
-        # Count sentiments
         sentiment = item.get('sentiment', 'NEUTRAL')
-        sentiment_counts[sentiment] = sentiment_counts.get(sentiment, 0) + 1
-        
+
         # Sum scores
         scores = item.get('sentiment_scores', {})
         for key in avg_scores:
             avg_scores[key] += scores.get(key, 0)
-        
+
         # Track category sentiment
         category = item.get('metadata', {}).get('category', 'uncategorized')
         if category not in category_sentiment:
@@ -142,28 +222,21 @@ def calculate_analytics(items: List[Dict]) -> Dict[str, Any]:
                 'POSITIVE': 0, 'NEGATIVE': 0, 'NEUTRAL': 0, 'MIXED': 0
             }
         category_sentiment[category][sentiment] += 1
-        
-        # Track customer feedback frequency
-        customer_id = item.get('customer_id', 'anonymous')
-        customer_feedback_count[customer_id] = customer_feedback_count.get(customer_id, 0) + 1
-    
+
     # Calculate averages
     if total_feedback > 0:
         for key in avg_scores:
             avg_scores[key] = round(avg_scores[key] / total_feedback, 4)
-    
+
     # Calculate sentiment percentages
     sentiment_percentages = {}
     if total_feedback > 0:
         for sentiment, count in sentiment_counts.items():
             sentiment_percentages[sentiment] = round((count / total_feedback) * 100, 2)
-    
-    # Get top customers by feedback volume
-    top_customers = sorted(
-        customer_feedback_count.items(), 
-        key=lambda x: x[1], 
-        reverse=True
-    )[:10]
+
+    # Top customers by feedback volume; most_common uses a C-level heap
+    # rather than sorting the full customer list
+    top_customers = customer_feedback_count.most_common(10)
     
     return {
         'total_feedback': total_feedback,
@@ -172,13 +245,40 @@ def calculate_analytics(items: List[Dict]) -> Dict[str, Any]:
         'average_sentiment_scores': avg_scores,
         'category_breakdown': category_sentiment,
         'top_customers': [
-            {'customer_id': cid, 'feedback_count': count} 
+            {'customer_id': cid, 'feedback_count': count}
             for cid, count in top_customers
-        ],
-        'recent_feedback': items[:10]  # Last 10 items
+        ]
     }
 
 
+def hydrate_feedback_text(items: List[Dict]) -> List[Dict]:
+    """
+    Fill in full feedback text for items whose raw text lives in S3
+
+    Only the recent_feedback slice is hydrated, so this costs at most
+    ten small S3 reads per call.
+
+    Args:
+        items: Feedback items, possibly carrying an s3_key pointer
+
+    Returns:
+        The same items with feedback_text populated where possible
+    """
+    for item in items:
+        s3_key = item.get('s3_key')
+        if not s3_key or 'feedback_text' in item:
+            continue
+
+        try:
+            obj = s3.get_object(Bucket=config.S3_BUCKET, Key=s3_key)
+            item['feedback_text'] = obj['Body'].read().decode('utf-8')
+        except Exception as e:
+            print(f"Error fetching feedback text from S3: {str(e)}")
+            item['feedback_text'] = item.get('preview', '')
+
+    return items
+
+
 def get_empty_analytics() -> Dict[str, Any]:
     """Return empty analytics structure"""
     return {
@@ -209,44 +309,59 @@ def get_empty_analytics() -> Dict[str, Any]:
 
 
 def parse_request_body(event: dict) -> dict:
-    """Parse request body from API Gateway event"""
+    """
+    Parse request body from API Gateway event
+
+    Bodies that arrive already parsed are passed through without a
+    redundant JSON parse; base64-encoded payloads are decoded first.
+    """
     body = event.get('body', {})
-    
+
+    if event.get('isBase64Encoded') and isinstance(body, str):
+        try:
+            body = base64.b64decode(body).decode('utf-8')
+        except Exception:
+            return {}
+
     if isinstance(body, str):
         try:
-            return json.loads(body)
+            return json_loads(body)
         except:
             return {}
-    
+
     return body
 
 
-def decimal_to_float(obj):
-    """Convert Decimal to float for JSON serialization"""
+def decimals_to_float(obj):
+    """
+    Recursively convert Decimal to float for JSON serialization
+
+    Walks the structure directly instead of round-tripping through JSON,
+    which would serialize and re-parse the entire payload.
+    """
     if isinstance(obj, Decimal):
         return float(obj)
-    raise TypeError
+    if isinstance(obj, dict):
+        return {key: decimals_to_float(value) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [decimals_to_float(value) for value in obj]
+    return obj
 
 
 def success_response(data: dict, status_code: int = 200) -> dict:
     """Create success response with CORS headers"""
-    return cors_response(status_code, json.dumps(data))
+    return cors_response(status_code, json_dumps(data))
 
 
 def error_response(message: str, status_code: int = 500) -> dict:
     """Create error response with CORS headers"""
-    return cors_response(status_code, json.dumps({'error': message}))
+    return cors_response(status_code, json_dumps({'error': message}))
 
 
 def cors_response(status_code: int, body: str) -> dict:
     """Create response with CORS headers"""
     return {
         'statusCode': status_code,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': config.ALLOWED_ORIGINS,
-            'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-            'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS'
-        },
+        'headers': CORS_HEADERS,
         'body': body
     }
@@ -67,6 +67,22 @@ else
         --role-name $ROLE_NAME \
         --policy-arn arn:aws:iam::aws:policy/AmazonDynamoDBFullAccess
 
+    # Feedback text is offloaded to S3 with a pointer in DynamoDB, so
+    # the function needs read/write on the data bucket
+    aws iam put-role-policy \
+        --role-name $ROLE_NAME \
+        --policy-name FeedbackTextS3Access \
+        --policy-document "{
+  \"Version\": \"2012-10-17\",
+  \"Statement\": [
+    {
+      \"Effect\": \"Allow\",
+      \"Action\": [\"s3:PutObject\", \"s3:GetObject\"],
+      \"Resource\": \"arn:aws:s3:::$S3_BUCKET/*\"
+    }
+  ]
+}"
+
     echo -e "${GREEN}Role created successfully${NC}"
     echo "Waiting 10 seconds for role propagation..."
     sleep 10
@@ -77,14 +93,28 @@ echo -e "${YELLOW}[2/8] Creating DynamoDB Table...${NC}"
 if aws dynamodb describe-table --table-name $TABLE_NAME --region $AWS_REGION 2>/dev/null; then
     echo "Table $TABLE_NAME already exists, skipping..."
 else
+    # ByTimestamp GSI (constant partition key + timestamp sort key)
+    # backs the newest-first analytics query; must match the
+    # CloudFormation/Terraform schema
     aws dynamodb create-table \
         --table-name $TABLE_NAME \
         --attribute-definitions \
             AttributeName=feedback_id,AttributeType=S \
             AttributeName=timestamp,AttributeType=S \
+            AttributeName=gsi_pk,AttributeType=S \
         --key-schema \
             AttributeName=feedback_id,KeyType=HASH \
             AttributeName=timestamp,KeyType=RANGE \
+        --global-secondary-indexes '[
+          {
+            "IndexName": "ByTimestamp",
+            "KeySchema": [
+              {"AttributeName": "gsi_pk", "KeyType": "HASH"},
+              {"AttributeName": "timestamp", "KeyType": "RANGE"}
+            ],
+            "Projection": {"ProjectionType": "ALL"}
+          }
+        ]' \
         --billing-mode PAY_PER_REQUEST \
         --region $AWS_REGION
 
@@ -24,14 +24,20 @@ resource "aws_dynamodb_table" "feedback_table" {
     type = "S"
   }
 
+  attribute {
+    name = "gsi_pk"
+    type = "S"
+  }
+
   attribute {
     name = "timestamp"
     type = "S"
   }
 
   global_secondary_index {
-    name            = "timestamp-index"
-    hash_key        = "timestamp"
+    name            = "ByTimestamp"
+    hash_key        = "gsi_pk"
+    range_key       = "timestamp"
     projection_type = "ALL"
   }
 
@@ -41,6 +47,16 @@ resource "aws_dynamodb_table" "feedback_table" {
   }
 }
 
+# S3 Bucket for raw feedback text (DynamoDB items keep only a pointer)
+resource "aws_s3_bucket" "feedback_text_bucket" {
+  bucket = "${var.project_name}-${var.environment}-feedback-text"
+
+  tags = {
+    Project     = var.project_name
+    Environment = var.environment
+  }
+}
+
 # S3 Bucket for website hosting
 resource "aws_s3_bucket" "website_bucket" {
   bucket = "${var.project_name}-${var.environment}-website"
@@ -153,6 +169,14 @@ resource "aws_iam_role_policy" "lambda_policy" {
           aws_dynamodb_table.feedback_table.arn,
           "${aws_dynamodb_table.feedback_table.arn}/index/*"
         ]
+      },
+      {
+        Effect = "Allow"
+        Action = [
+          "s3:PutObject",
+          "s3:GetObject"
+        ]
+        Resource = "${aws_s3_bucket.feedback_text_bucket.arn}/*"
       }
     ]
   })
@@ -166,11 +190,14 @@ resource "aws_lambda_function" "analyze_feedback" {
   handler       = "lambda_function.lambda_handler"
   runtime       = "python3.9"
   timeout       = 60
-  memory_size   = 256
+  # 1024 MB gives the boto3/Comprehend workload proportionally more CPU;
+  # cold and warm times drop far more than the memory price rises
+  memory_size   = 1024
 
   environment {
     variables = {
       DYNAMODB_TABLE = aws_dynamodb_table.feedback_table.name
+      S3_BUCKET      = aws_s3_bucket.feedback_text_bucket.bucket
       AWS_REGION     = var.aws_region
     }
   }
@@ -189,11 +216,14 @@ resource "aws_lambda_function" "get_analytics" {
   handler       = "lambda_function.lambda_handler"
   runtime       = "python3.9"
   timeout       = 60
-  memory_size   = 256
+  # 1024 MB gives the boto3/Comprehend workload proportionally more CPU;
+  # cold and warm times drop far more than the memory price rises
+  memory_size   = 1024
 
   environment {
     variables = {
       DYNAMODB_TABLE = aws_dynamodb_table.feedback_table.name
+      S3_BUCKET      = aws_s3_bucket.feedback_text_bucket.bucket
       AWS_REGION     = var.aws_region
     }
   }
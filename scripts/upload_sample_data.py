@@ -4,36 +4,270 @@ Upload Sample Data Script
 Uploads sample feedback data to the API for testing
 """
 
+import argparse
+import asyncio
+import hashlib
 import json
-import requests
+import os
+import shelve
 import sys
 import time
-from typing import List, Dict
+from collections import deque
+from functools import partial
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# ijson enables incremental parsing of the sample file; without it the
+# whole array is loaded up front as before
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# Prefer orjson (C implementation, 3-10x faster) for payload
+# serialization; fall back to stdlib json otherwise
+try:
+    import orjson
+
+    def json_dumps_bytes(data) -> bytes:
+        return orjson.dumps(data)
+
+    json_loads = orjson.loads
+    JSONDecodeError = orjson.JSONDecodeError
+except ImportError:
+    def json_dumps_bytes(data) -> bytes:
+        return json.dumps(data).encode("utf-8")
+
+    json_loads = json.loads
+    JSONDecodeError = json.JSONDecodeError
+
+# The HTTP stack (requests/urllib3, httpx, aiohttp) costs tens of
+# milliseconds to import, which the fast-exit error paths — missing
+# API_ENDPOINT, bad sample file — should never pay. It is loaded
+# lazily on first use; these globals are populated by the loaders
+# below.
+httpx = None
+aiohttp = None
+_async_probed = False
+_session = None
+
+
+def _load_async_transport():
+    """
+    Import the best available async HTTP transport on first use
+
+    Preferred ladder: httpx with HTTP/2 multiplexes every request over
+    a single connection; aiohttp uploads concurrently over pooled
+    HTTP/1.1 connections; with neither installed the caller falls back
+    to sequential uploads.
+    """
+    global httpx, aiohttp, _async_probed
+    if not _async_probed:
+        _async_probed = True
+        try:
+            import h2  # noqa: F401 -- http2=True requires it at client construction
+            import httpx as _httpx
+            httpx = _httpx
+        except ImportError:
+            try:
+                import aiohttp as _aiohttp
+                aiohttp = _aiohttp
+            except ImportError:
+                pass
+    return httpx, aiohttp
 
 # Configuration
 API_ENDPOINT = "YOUR_API_ENDPOINT_HERE"  # Update this after deployment
 SAMPLE_DATA_FILE = "../data/sample_feedback.json"
+CONCURRENCY = 10  # Max in-flight requests
+BATCH_SIZE = 25  # Items per /analyze request; matches Comprehend's batch API limit
+DEFAULT_RPS = 10  # Request rate cap; tune with --rps to the account limit
+DEFAULT_CACHE_DIR = os.path.expanduser("~/.cache/cfa-uploader")
+CACHE_TTL = 86400  # Cached responses expire after a day
+
+# Sent with pre-serialized bodies, since data= skips the content type
+# that json= would set
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Shared .get() default; avoids allocating a fresh empty dict per item
+# in the report loop
+_EMPTY: Dict = {}
+
+def _get_session():
+    """
+    Build the shared requests Session on first use
+
+    One pooled connection is reused across uploads instead of a fresh
+    TCP+TLS handshake per item, and retries with backoff replace the
+    old blanket inter-request sleep.
+    """
+    global _session
+    if _session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        _session = requests.Session()
+        _session.mount('https://', HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=16,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.3,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=['POST']
+            )
+        ))
+    return _session
 
 
 def load_sample_data(file_path: str) -> List[Dict]:
     """Load sample feedback from JSON file"""
     try:
-        with open(file_path, 'r') as f:
-            return json.load(f)
+        # Read bytes: orjson only accepts bytes/str, and stdlib
+        # json.loads handles bytes fine
+        with open(file_path, 'rb') as f:
+            return json_loads(f.read())
     except FileNotFoundError:
         print(f"Error: File not found - {file_path}")
         sys.exit(1)
-    except json.JSONDecodeError as e:
+    except JSONDecodeError as e:
         print(f"Error: Invalid JSON - {e}")
         sys.exit(1)
 
 
-def analyze_feedback(feedback_data: Dict) -> Dict:
-    """Send feedback to API for analysis"""
-    url = f"{API_ENDPOINT}/analyze"
-    
-    payload = {
-        "operation": "analyze_feedback",
+def iter_sample_data(file_path: str) -> Iterator[Dict]:
+    """
+    Yield feedback items from the sample file one at a time
+
+    With ijson installed the array is parsed incrementally, so the
+    first upload can start before the whole file is materialized and
+    peak memory stays bounded for large sample files.
+    """
+    if ijson is None:
+        yield from load_sample_data(file_path)
+        return
+
+    try:
+        with open(file_path, 'rb') as f:
+            yield from ijson.items(f, 'item')
+    except FileNotFoundError:
+        print(f"Error: File not found - {file_path}")
+        sys.exit(1)
+    except ijson.JSONError as e:
+        print(f"Error: Invalid JSON - {e}")
+        sys.exit(1)
+
+
+class RateLimiter:
+    """
+    Sliding-window rate limiter for outgoing requests
+
+    Records the send times of the last max_calls requests in a deque
+    and waits only when that many went out within the last period — a
+    fast server is never idled, and a saturated window backs off by
+    exactly the required amount. HTTP 429 responses are additionally
+    handled by the session's Retry policy, which is the server's own
+    slow-down signal.
+    """
+
+    def __init__(self, max_calls: int, period: float = 1.0):
+        self.max_calls = max_calls
+        self.period = period
+        self._sent = deque(maxlen=max_calls)
+
+    def _delay(self) -> float:
+        if len(self._sent) < self.max_calls:
+            return 0.0
+        return max(0.0, self._sent[0] + self.period - time.monotonic())
+
+    def acquire(self) -> None:
+        """Block until a request may be sent"""
+        delay = self._delay()
+        if delay > 0:
+            time.sleep(delay)
+        self._sent.append(time.monotonic())
+
+    async def acquire_async(self) -> None:
+        """Await until a request may be sent"""
+        while True:
+            delay = self._delay()
+            if delay <= 0:
+                break
+            await asyncio.sleep(delay)
+        self._sent.append(time.monotonic())
+
+
+class ResponseCache:
+    """
+    Disk cache of analyze responses keyed by feedback-text hash
+
+    Re-runs against the same sample file are common during development;
+    serving repeats from disk drops their network and Comprehend cost
+    to zero. Entries carry a TTL so stale analyses age out.
+    """
+
+    def __init__(self, cache_dir: str, ttl: int = CACHE_TTL):
+        os.makedirs(cache_dir, exist_ok=True)
+        self._shelf = shelve.open(os.path.join(cache_dir, "responses"))
+        self.ttl = ttl
+
+    @staticmethod
+    def key(feedback_data: Dict) -> str:
+        text = feedback_data.get("feedback") or ""
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get(self, feedback_data: Dict) -> Optional[Dict]:
+        entry = self._shelf.get(self.key(feedback_data))
+        if entry and entry["expires"] > time.time():
+            return entry["result"]
+        return None
+
+    def set(self, feedback_data: Dict, result: Dict) -> None:
+        self._shelf[self.key(feedback_data)] = {
+            "result": result,
+            "expires": time.time() + self.ttl
+        }
+
+    def close(self) -> None:
+        self._shelf.close()
+
+
+def split_cached(chunk: List[Dict], cache: Optional[ResponseCache]):
+    """Partition a chunk into cached results (by index) and pending items"""
+    cached_results: Dict[int, Dict] = {}
+    pending: List[Tuple[int, Dict]] = []
+
+    for i, feedback in enumerate(chunk):
+        result = cache.get(feedback) if cache else None
+        if result is not None:
+            cached_results[i] = result
+        else:
+            pending.append((i, feedback))
+
+    return cached_results, pending
+
+
+def merge_results(chunk_len: int, cached_results: Dict[int, Dict],
+                  pending: List[Tuple[int, Dict]], fresh: List[Optional[Dict]],
+                  cache: Optional[ResponseCache]) -> List[Optional[Dict]]:
+    """Interleave cached and fresh results back into chunk order"""
+    results: List[Optional[Dict]] = [None] * chunk_len
+
+    for i, result in cached_results.items():
+        results[i] = result
+
+    for (i, feedback), result in zip(pending, fresh):
+        results[i] = result
+        if cache is not None and result:
+            cache.set(feedback, result)
+
+    return results
+
+
+def build_item(feedback_data: Dict) -> Dict:
+    """Build the analyze request item for one piece of feedback"""
+    return {
         "feedback": feedback_data.get("feedback"),
         "customer_id": feedback_data.get("customer_id"),
         "metadata": {
@@ -41,22 +275,208 @@ def analyze_feedback(feedback_data: Dict) -> Dict:
             "expected_sentiment": feedback_data.get("expected_sentiment")
         }
     }
-    
+
+
+def batch_payload(chunk: List[Dict]) -> Dict:
+    """Build the batch analyze payload for a chunk of feedback items"""
+    return {
+        "operation": "analyze_feedback_batch",
+        "items": [build_item(feedback) for feedback in chunk]
+    }
+
+
+def chunked(feedback_iter: Iterable[Dict], size: int = BATCH_SIZE) -> Iterator[List[Dict]]:
+    """Yield successive size-item chunks from any iterable"""
+    iterator = iter(feedback_iter)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def analyze_feedback_batch(chunk: List[Dict],
+                           limiter: Optional[RateLimiter] = None) -> List[Optional[Dict]]:
+    """Send a chunk of feedback to the API in one batch request"""
+    url = f"{API_ENDPOINT}/analyze"
+
+    import requests  # resolved from sys.modules after the first session build
+    session = _get_session()
+
+    if limiter is not None:
+        limiter.acquire()
+
     try:
-        response = requests.post(url, json=payload, timeout=30)
+        # Split timeout: fail fast on connect, allow the full analysis
+        # time for the response
+        response = session.post(
+            url,
+            data=json_dumps_bytes(batch_payload(chunk)),
+            headers=JSON_HEADERS,
+            timeout=(3.05, 60)
+        )
         response.raise_for_status()
-        return response.json()
+        return json_loads(response.content).get("results", [None] * len(chunk))
     except requests.exceptions.RequestException as e:
         print(f"Error: API request failed - {e}")
-        return None
+        return [None] * len(chunk)
+
+
+async def analyze_feedback_batch_async(session, semaphore, chunk: List[Dict],
+                                       limiter: Optional[RateLimiter] = None) -> List[Optional[Dict]]:
+    """Send a chunk of feedback to the API over the shared session"""
+    url = f"{API_ENDPOINT}/analyze"
+
+    async with semaphore:
+        if limiter is not None:
+            await limiter.acquire_async()
+
+        try:
+            async with session.post(
+                url,
+                data=json_dumps_bytes(batch_payload(chunk)),
+                headers=JSON_HEADERS,
+                timeout=aiohttp.ClientTimeout(total=60)
+            ) as response:
+                response.raise_for_status()
+                body = json_loads(await response.read())
+                return body.get("results", [None] * len(chunk))
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"Error: API request failed - {e}")
+            return [None] * len(chunk)
+
+
+async def analyze_feedback_batch_httpx(client, semaphore, chunk: List[Dict],
+                                       limiter: Optional[RateLimiter] = None) -> List[Optional[Dict]]:
+    """Send a chunk of feedback as one HTTP/2 stream on the shared client"""
+    url = f"{API_ENDPOINT}/analyze"
+
+    async with semaphore:
+        if limiter is not None:
+            await limiter.acquire_async()
+
+        try:
+            response = await client.post(
+                url,
+                content=json_dumps_bytes(batch_payload(chunk)),
+                headers=JSON_HEADERS
+            )
+            response.raise_for_status()
+            return json_loads(response.content).get("results", [None] * len(chunk))
+        except httpx.HTTPError as e:
+            print(f"Error: API request failed - {e}")
+            return [None] * len(chunk)
+
+
+async def upload_async(feedback_iter: Iterable[Dict],
+                       cache: Optional[ResponseCache] = None,
+                       limiter: Optional[RateLimiter] = None) -> Tuple[List[Dict], List[Optional[Dict]]]:
+    """
+    Upload all feedback as concurrent batch requests
+
+    Batching amortizes API Gateway and Lambda dispatch across 25 items
+    per request, while a semaphore bounds the in-flight requests —
+    replacing the old per-item round trips and the fixed sleep between
+    them. Items already in the response cache are served locally and
+    never hit the network.
+
+    With httpx installed, HTTP/2 multiplexes every request over a
+    single TCP+TLS connection: one handshake total, plus HPACK header
+    compression, regardless of concurrency. aiohttp remains the
+    fallback with one pooled HTTP/1.1 connection per in-flight request.
+    """
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    if httpx is not None:
+        session = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=1, max_keepalive_connections=1),
+            timeout=httpx.Timeout(60.0, connect=3.05)
+        )
+        send = partial(analyze_feedback_batch_httpx, session, semaphore, limiter=limiter)
+    else:
+        session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=CONCURRENCY))
+        send = partial(analyze_feedback_batch_async, session, semaphore, limiter=limiter)
+
+    async with session:
+        items: List[Dict] = []
+        chunk_meta = []
+        tasks = []
+        for chunk in chunked(feedback_iter):
+            items.extend(chunk)
+            cached_results, pending = split_cached(chunk, cache)
+            chunk_meta.append((len(chunk), cached_results, pending))
+            if pending:
+                tasks.append(asyncio.ensure_future(
+                    send([feedback for _, feedback in pending])
+                ))
+            else:
+                tasks.append(None)
+        fresh_iter = iter(await asyncio.gather(*[t for t in tasks if t is not None]))
+
+    # Interleave cached and fresh results back into per-item order
+    results: List[Optional[Dict]] = []
+    for (chunk_len, cached_results, pending), task in zip(chunk_meta, tasks):
+        fresh = next(fresh_iter) if task is not None else []
+        results.extend(merge_results(chunk_len, cached_results, pending, fresh, cache))
+
+    return items, results
+
+
+def upload_sequential(feedback_iter: Iterable[Dict],
+                      cache: Optional[ResponseCache] = None,
+                      limiter: Optional[RateLimiter] = None) -> Tuple[List[Dict], List[Optional[Dict]]]:
+    """
+    Upload feedback in sequential batch requests (no aiohttp available)
+
+    Consumes the feedback iterator chunk by chunk, so parsing overlaps
+    the uploads instead of completing before the first request. Cached
+    items are served locally; only the rest are sent. No inter-request
+    sleep: the session's Retry policy backs off only when the API
+    actually returns 429/5xx, so well-behaved runs are not throttled
+    artificially.
+    """
+    items: List[Dict] = []
+    results: List[Optional[Dict]] = []
+    for chunk in chunked(feedback_iter):
+        items.extend(chunk)
+        cached_results, pending = split_cached(chunk, cache)
+        fresh = (
+            analyze_feedback_batch([feedback for _, feedback in pending], limiter)
+            if pending else []
+        )
+        results.extend(merge_results(len(chunk), cached_results, pending, fresh, cache))
+    return items, results
+
+
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(
+        description="Upload sample feedback data to the API"
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true",
+        help="bypass the local response cache and re-upload everything"
+    )
+    parser.add_argument(
+        "--cache-dir", default=DEFAULT_CACHE_DIR,
+        help="directory for the response cache (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--rps", type=int, default=DEFAULT_RPS,
+        help="max requests per second; 0 disables the limiter (default: %(default)s)"
+    )
+    return parser.parse_args(argv)
 
 
 def main():
     """Main execution"""
+    args = parse_args()
+
     print("=" * 60)
     print("Customer Feedback Analysis - Sample Data Upload")
     print("=" * 60)
-    
+
     # Check API endpoint is configured
     if API_ENDPOINT == "YOUR_API_ENDPOINT_HERE":
         print("\nError: Please update API_ENDPOINT in this script")
@@ -65,37 +485,56 @@ def main():
         print("    --stack-name customer-feedback-analysis-prod \\")
         print("    --query 'Stacks[0].Outputs[?OutputKey==`APIEndpoint`].OutputValue'")
         sys.exit(1)
-    
+
     print(f"\nAPI Endpoint: {API_ENDPOINT}")
-    
-    # Load sample data
+
+    # Stream sample data into the upload pipeline; the item count is
+    # only known once the iterator is exhausted
     print(f"\nLoading sample data from {SAMPLE_DATA_FILE}...")
-    sample_data = load_sample_data(SAMPLE_DATA_FILE)
-    print(f"Loaded {len(sample_data)} sample feedback items")
-    
-    # Upload each feedback
+    feedback_iter = iter_sample_data(SAMPLE_DATA_FILE)
+
+    cache = None if args.no_cache else ResponseCache(args.cache_dir)
+    limiter = RateLimiter(args.rps) if args.rps > 0 else None
+
+    # Probe async transports only now, past the fast-exit error paths
+    httpx_mod, aiohttp_mod = _load_async_transport()
+    if httpx_mod is not None:
+        mode = 'concurrent, HTTP/2'
+    elif aiohttp_mod is not None:
+        mode = 'concurrent'
+    else:
+        mode = 'sequential'
+
+    print(f"\nUploading feedback ({mode})...")
+    try:
+        if httpx_mod is not None or aiohttp_mod is not None:
+            sample_data, results = asyncio.run(upload_async(feedback_iter, cache, limiter))
+        else:
+            sample_data, results = upload_sequential(feedback_iter, cache, limiter)
+    finally:
+        if cache is not None:
+            cache.close()
+    print(f"Uploaded {len(sample_data)} sample feedback items")
+
+    # Report per-item outcomes
     successful = 0
     failed = 0
-    
-    print("\nUploading feedback...")
-    for i, feedback in enumerate(sample_data, 1):
-        print(f"\n[{i}/{len(sample_data)}] Processing: {feedback['customer_id']}")
+
+    for i, (feedback, result) in enumerate(zip(sample_data, results), 1):
+        print(f"\n[{i}/{len(sample_data)}] Processed: {feedback['customer_id']}")
         print(f"  Expected sentiment: {feedback.get('expected_sentiment', 'N/A')}")
-        
-        result = analyze_feedback(feedback)
-        
+
         if result:
-            print(f"  ✓ Detected sentiment: {result.get('sentiment')}")
-            print(f"  ✓ Confidence: {result.get('sentiment_scores', {}).get(result.get('sentiment', '').lower(), 0):.2f}")
+            # Look the sentiment up once and reuse it for both lines
+            sentiment = (result.get('sentiment') or '').lower()
+            confidence = result.get('sentiment_scores', _EMPTY).get(sentiment, 0.0)
+            print(f"  ✓ Detected sentiment: {sentiment.upper()}")
+            print(f"  ✓ Confidence: {confidence:.2f}")
             successful += 1
         else:
             print(f"  ✗ Failed to analyze")
             failed += 1
-        
-        # Delay to avoid rate limiting
-        if i < len(sample_data):
-            time.sleep(0.5)
-    
+
     # Summary
     print("\n" + "=" * 60)
     print("Upload Complete")
@@ -103,7 +542,7 @@ def main():
     print(f"Total: {len(sample_data)}")
     print(f"Successful: {successful}")
     print(f"Failed: {failed}")
-    
+
     if successful > 0:
         print("\nYou can now view the analytics dashboard to see the results!")
 
@@ -0,0 +1,88 @@
+"""
+Shared pytest fixtures for the Lambda test suite
+
+Every test already mocks its AWS calls, so importing the real boto3 —
+and through it botocore's large JSON service models — buys nothing and
+dominates collection time for a suite this small. Installing
+lightweight stand-ins into sys.modules before the test modules import
+keeps that cost out of the run entirely.
+
+Import paths and the boto3 stand-ins are set up here once instead of
+per test module, so every xdist worker configures itself identically;
+the suite runs under `pytest -n auto --dist=loadfile` as well as
+serially.
+"""
+
+import pathlib
+import sys
+import types
+from unittest.mock import Mock
+
+import pytest
+
+# Make the Lambda sources importable the same way in every worker
+_BACKEND = pathlib.Path(__file__).parent.parent / 'backend'
+sys.path.insert(0, str(_BACKEND / 'lambda' / 'analyze_feedback'))
+sys.path.insert(0, str(_BACKEND))
+
+
+class _FakeConfig:
+    """Stand-in for botocore.config.Config; records kwargs, does nothing"""
+
+    def __init__(self, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+
+
+class _FakeKey:
+    """Stand-in for boto3.dynamodb.conditions.Key"""
+
+    def __init__(self, name):
+        self.name = name
+
+    def eq(self, value):
+        return (self.name, 'eq', value)
+
+
+def _install_fake_boto():
+    """
+    Register boto3/botocore stand-ins in sys.modules
+
+    Skipped when the real boto3 is already imported (e.g. by a pytest
+    plugin); the tests work against either since they patch the client
+    and resource factories anyway.
+    """
+    if 'boto3' in sys.modules:
+        return
+
+    botocore = types.ModuleType('botocore')
+    botocore_config = types.ModuleType('botocore.config')
+    botocore_config.Config = _FakeConfig
+    botocore.config = botocore_config
+
+    boto3 = types.ModuleType('boto3')
+    boto3.client = lambda *args, **kwargs: Mock()
+    boto3.resource = lambda *args, **kwargs: Mock()
+
+    boto3_dynamodb = types.ModuleType('boto3.dynamodb')
+    boto3_conditions = types.ModuleType('boto3.dynamodb.conditions')
+    boto3_conditions.Key = _FakeKey
+    boto3_dynamodb.conditions = boto3_conditions
+    boto3.dynamodb = boto3_dynamodb
+
+    sys.modules['botocore'] = botocore
+    sys.modules['botocore.config'] = botocore_config
+    sys.modules['boto3'] = boto3
+    sys.modules['boto3.dynamodb'] = boto3_dynamodb
+    sys.modules['boto3.dynamodb.conditions'] = boto3_conditions
+
+
+# Must run at import time: fixtures execute after collection, which is
+# already too late to beat the test modules' imports
+_install_fake_boto()
+
+
+@pytest.fixture(scope='session')
+def fake_boto():
+    """The boto3 module the suite runs against (stand-in or real)"""
+    return sys.modules['boto3']
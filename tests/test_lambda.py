@@ -2,23 +2,70 @@
 Unit tests for Lambda functions
 """
 
+import importlib.util
 import unittest
 import json
-import sys
 import os
+import sys
 from unittest.mock import Mock, patch, MagicMock
 from decimal import Decimal
 
-# Add backend path to system path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../backend/lambda/analyze_feedback'))
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../backend'))
+_ga_module = None
+
+# Built once per process; get_analytics converts Decimals into fresh
+# structures, so sharing the fixture across tests is safe
+ANALYTICS_ITEMS = [
+    {
+        'feedback_id': 'feedback_1',
+        'customer_id': 'CUST1',
+        'sentiment': 'POSITIVE',
+        'sentiment_scores': {
+            'positive': Decimal('0.95'),
+            'negative': Decimal('0.01'),
+            'neutral': Decimal('0.03'),
+            'mixed': Decimal('0.01')
+        }
+    },
+    {
+        'feedback_id': 'feedback_2',
+        'customer_id': 'CUST2',
+        'sentiment': 'NEGATIVE',
+        'sentiment_scores': {
+            'positive': Decimal('0.02'),
+            'negative': Decimal('0.93'),
+            'neutral': Decimal('0.04'),
+            'mixed': Decimal('0.01')
+        }
+    }
+]
+
+
+def load_get_analytics_module():
+    """
+    Load the get_analytics Lambda module under a non-clashing name
+
+    Both Lambda directories ship a lambda_function.py, so a plain
+    import would collide with the analyze_feedback module already on
+    sys.path. Loaded once and reused across tests.
+    """
+    global _ga_module
+    if _ga_module is None:
+        path = os.path.join(
+            os.path.dirname(__file__),
+            '../backend/lambda/get_analytics/lambda_function.py'
+        )
+        spec = importlib.util.spec_from_file_location('get_analytics_lambda', path)
+        _ga_module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(_ga_module)
+    return _ga_module
 
 class TestAnalyzeFeedbackLambda(unittest.TestCase):
     """Test cases for analyze_feedback Lambda function"""
 
-    def setUp(self):
-        """Set up test fixtures"""
-        self.sample_event = {
+    @classmethod
+    def setUpClass(cls):
+        """Build invariant fixtures once per class, not per test"""
+        cls.sample_event = {
             'httpMethod': 'POST',
             'body': json.dumps({
                 'feedback': 'This product is amazing!',
@@ -29,7 +76,16 @@ class TestAnalyzeFeedbackLambda(unittest.TestCase):
             })
         }
 
-        self.sample_context = Mock()
+        # spec_set pins the attribute surface, skipping Mock's lazy
+        # attribute machinery and catching typoed context lookups
+        cls.sample_context = Mock(spec_set=[
+            'aws_request_id', 'function_name', 'get_remaining_time_in_millis'
+        ])
+
+    def tearDown(self):
+        """Reset the validation memo so cached results don't leak between tests"""
+        from utils.comprehend_helper import validate_text_input
+        validate_text_input.cache_clear()
 
     @patch('boto3.client')
     @patch('boto3.resource')
@@ -88,68 +144,66 @@ class TestAnalyzeFeedbackLambda(unittest.TestCase):
 class TestGetAnalyticsLambda(unittest.TestCase):
     """Test cases for get_analytics Lambda function"""
 
-    def setUp(self):
-        """Set up test fixtures"""
-        self.sample_event = {
+    @classmethod
+    def setUpClass(cls):
+        """Build invariant fixtures once per class, not per test"""
+        cls.sample_event = {
             'httpMethod': 'POST',
             'body': json.dumps({
                 'limit': 50
             })
         }
 
-        self.sample_context = Mock()
+        cls.sample_context = Mock(spec_set=[
+            'aws_request_id', 'function_name', 'get_remaining_time_in_millis'
+        ])
 
-    @patch('boto3.resource')
-    def test_get_analytics_empty_table(self, mock_dynamodb):
+    def test_get_analytics_empty_table(self):
         """Test getting analytics from empty table"""
-        # Mock DynamoDB with no items
-        mock_table = Mock()
-        mock_table.scan.return_value = {'Items': []}
-        mock_dynamodb.return_value.Table.return_value = mock_table
+        module = load_get_analytics_module()
 
-        # Verify mock setup
-        result = mock_table.scan()
-        self.assertEqual(result['Items'], [])
+        # Mock the ByTimestamp GSI query returning no items
+        module.feedback_table = Mock()
+        module.feedback_table.query.return_value = {'Items': []}
 
-    @patch('boto3.resource')
-    def test_get_analytics_with_data(self, mock_dynamodb):
+        analytics = module.get_analytics(limit=50)
+
+        self.assertEqual(analytics['total_feedback'], 0)
+        self.assertEqual(analytics['recent_feedback'], [])
+        self.assertEqual(analytics['sentiment_distribution']['POSITIVE'], 0)
+
+    def test_get_analytics_with_data(self):
         """Test getting analytics with data"""
-        # Mock DynamoDB with sample items
-        mock_items = [
-            {
-                'feedback_id': 'feedback_1',
-                'sentiment': 'POSITIVE',
-                'sentiment_scores': {
-                    'positive': Decimal('0.95'),
-                    'negative': Decimal('0.01'),
-                    'neutral': Decimal('0.03'),
-                    'mixed': Decimal('0.01')
-                }
-            },
-            {
-                'feedback_id': 'feedback_2',
-                'sentiment': 'NEGATIVE',
-                'sentiment_scores': {
-                    'positive': Decimal('0.02'),
-                    'negative': Decimal('0.93'),
-                    'neutral': Decimal('0.04'),
-                    'mixed': Decimal('0.01')
-                }
-            }
-        ]
+        module = load_get_analytics_module()
 
-        mock_table = Mock()
-        mock_table.scan.return_value = {'Items': mock_items}
-        mock_dynamodb.return_value.Table.return_value = mock_table
+        # Mock the ByTimestamp GSI query; both the aggregation and the
+        # recent-feedback fetch go through it
+        module.feedback_table = Mock()
+        module.feedback_table.query.return_value = {'Items': ANALYTICS_ITEMS}
+
+        analytics = module.get_analytics(limit=50)
+
+        self.assertEqual(analytics['total_feedback'], 2)
+        self.assertEqual(analytics['sentiment_distribution']['POSITIVE'], 1)
+        self.assertEqual(analytics['sentiment_distribution']['NEGATIVE'], 1)
+        self.assertAlmostEqual(
+            analytics['average_sentiment_scores']['positive'], 0.485
+        )
+        self.assertEqual(len(analytics['recent_feedback']), 2)
 
-        # Verify mock setup
-        result = mock_table.scan()
-        self.assertEqual(len(result['Items']), 2)
+        # The aggregation must query the GSI, not scan the table
+        module.feedback_table.query.assert_called()
+        module.feedback_table.scan.assert_not_called()
 
 
 class TestComprehendHelper(unittest.TestCase):
     """Test cases for Comprehend Helper"""
 
+    def setUp(self):
+        """Clear the cached Comprehend clients so each test gets its own mock"""
+        from utils import comprehend_helper
+        comprehend_helper._comprehend_clients.clear()
+
     @patch('boto3.client')
     def test_detect_sentiment(self, mock_boto_client):
         """Test sentiment detection"""
@@ -235,10 +289,34 @@ class TestAPIResponses(unittest.TestCase):
         self.assertIn('error', body)
 
 
+def test_fake_boto_backs_helper_construction(fake_boto):
+    """
+    The boto3 module the suite runs against supports the code under test
+
+    Exercises the conftest stand-in (or the real boto3 when a plugin
+    loaded it first): the factories the tests patch must exist, and
+    ComprehendHelper must build a client through them.
+    """
+    assert callable(fake_boto.client)
+    assert callable(fake_boto.resource)
+
+    from utils import comprehend_helper
+    comprehend_helper._comprehend_clients.clear()
+    try:
+        helper = comprehend_helper.ComprehendHelper()
+        assert helper.comprehend is not None
+    finally:
+        comprehend_helper._comprehend_clients.clear()
+
+
 def run_tests():
     """Run all tests"""
     unittest.main()
 
 
 if __name__ == '__main__':
+    # Under pytest these inserts come from conftest.py; direct
+    # execution needs them here before any test imports the modules
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../backend/lambda/analyze_feedback'))
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../backend'))
     run_tests()